@@ -3,9 +3,57 @@
 高德地图Web服务API文档: https://lbs.amap.com/api/webservice/guide/api/newpoisearch
 """
 
+import asyncio
+import copy
+import random
+import re
+import time
 import httpx
+import orjson
+from collections import OrderedDict
+from types import MappingProxyType
 from typing import Optional
-from config import config
+from urllib.parse import urlencode
+from config import config, HTTP2_ENABLED
+
+# 地理编码/IP定位缓存的最大条目数
+GEO_CACHE_SIZE = 10_000
+# 缓存有效期(秒)：地址坐标基本不变；IP分配可能变化，有效期较短
+GEO_CACHE_TTL = 86400
+IP_CACHE_TTL = 3600
+
+# 搜索结果缓存：短有效期，应对重复提问和相同的"美食"扩大搜索
+SEARCH_CACHE_TTL = 60
+SEARCH_CACHE_SIZE = 256
+
+# 请求重试：最多尝试次数，退避起始/上限时间(秒)
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.1
+RETRY_BACKOFF_MAX = 1.0
+
+# 多关键词并发搜索的整体超时(秒)，超时未返回的搜索直接丢弃
+MULTI_SEARCH_TIMEOUT = 3.0
+
+# 有预算过滤时并发获取的页数，筛掉超预算的餐厅后仍有足够候选
+BUDGET_SEARCH_PAGES = 3
+
+# 熔断：连续失败达到次数后，在冷却时间(秒)内直接失败
+BREAKER_FAIL_MAX = 10
+BREAKER_RESET_TIMEOUT = 30.0
+
+# 限流：高德返回QPS超限后，在该时间(秒)内不再发起请求
+RATE_LIMIT_BACKOFF = 1.0
+_RATE_LIMIT_INFOS = frozenset({"CUQPS_HAS_EXCEEDED_THE_LIMIT", "ACCESS_TOO_FREQUENT"})
+
+# 人均消费中的整数部分（如"45.5元" -> "45"）
+_COST_RE = re.compile(r"\d+")
+
+# 口味→关键词映射（只读）
+TASTE_KEYWORDS = MappingProxyType({
+    "清淡": ("粤菜", "日料", "素食"),
+    "辣": ("川菜", "湘菜", "火锅"),
+    "鲜": ("海鲜", "日料", "粤菜"),
+})
 
 
 class FoodAPIService:
@@ -13,14 +61,197 @@ class FoodAPIService:
 
     def __init__(self):
         self.api_key = config.AMAP_API_KEY
-        self.base_url = "https://restapi.amap.com/v5/place"
+        self.base_url = "https://restapi.amap.com"
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # POI接口固定不变的查询参数，每次请求只追加变化的部分
+        self._search_base_params = (
+            ("key", self.api_key),
+            ("types", "050000"),  # 餐饮服务大类
+            ("show_fields", "business"),
+        )
+        self._detail_base_params = (
+            ("key", self.api_key),
+            ("show_fields", "business"),
+        )
+        # 限制并发请求数，避免触发高德QPS限制
+        self._semaphore = asyncio.Semaphore(5)
+
+        # 熔断状态
+        self._failures = 0
+        self._breaker_open_until = 0.0
+        # 限流冷却截止时间
+        self._rate_limit_until = 0.0
+
+        # 进行中的请求，相同请求并发时共享同一个结果
+        self._inflight: dict[str, asyncio.Task] = {}
+
+        # 地理编码/IP定位结果缓存 (TTL + LRU): key -> (过期时间, 结果)
+        self._geo_cache: OrderedDict = OrderedDict()
+        self._ip_cache: OrderedDict = OrderedDict()
+        # 搜索结果缓存 (TTL + LRU): (path, 参数) -> (过期时间, 结果)
+        self._search_cache: OrderedDict = OrderedDict()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取共享的HTTP客户端（首次使用时创建，复用连接池）"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2_ENABLED,
+                timeout=httpx.Timeout(10.0, connect=2.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def aclose(self):
+        """关闭HTTP客户端，释放连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _send_with_retry(self, path: str, params) -> httpx.Response:
+        """发送请求，网络错误或5xx时指数退避(带随机抖动)重试"""
+        for attempt in range(RETRY_ATTEMPTS):
+            try:
+                response = await self._get_client().get(path, params=params)
+                if response.status_code < 500:
+                    return response
+                error = httpx.HTTPStatusError(
+                    f"高德服务异常: {response.status_code}",
+                    request=response.request,
+                    response=response
+                )
+            except httpx.TransportError as e:
+                error = e
+
+            if attempt < RETRY_ATTEMPTS - 1:
+                delay = min(RETRY_BACKOFF * 2 ** attempt, RETRY_BACKOFF_MAX)
+                await asyncio.sleep(delay + random.uniform(0, delay))
+
+        raise error
+
+    async def _request_json(self, path: str, params) -> dict:
+        """请求高德接口并解析JSON，连续失败过多时熔断"""
+        now = time.monotonic()
+        if now < self._breaker_open_until:
+            raise RuntimeError("高德服务暂时不可用")
+        if now < self._rate_limit_until:
+            raise RuntimeError("高德接口请求过于频繁，请稍后再试")
+
+        try:
+            response = await self._send_with_retry(path, params)
+            # 直接解析响应字节，跳过编码探测和str解码
+            data = orjson.loads(response.content)
+        except Exception:
+            self._failures += 1
+            if self._failures >= BREAKER_FAIL_MAX:
+                self._breaker_open_until = time.monotonic() + BREAKER_RESET_TIMEOUT
+                self._failures = 0
+            raise
+
+        self._failures = 0
+        if data.get("info") in _RATE_LIMIT_INFOS:
+            self._rate_limit_until = time.monotonic() + RATE_LIMIT_BACKOFF
+        return data
+
+    async def _get_json(self, path: str, params) -> dict:
+        """
+        请求高德接口 (single-flight)
 
-        # 口味→关键词映射
-        self.taste_keywords = {
-            "清淡": ["粤菜", "日料", "素食"],
-            "辣": ["川菜", "湘菜", "火锅"],
-            "鲜": ["海鲜", "日料", "粤菜"],
-        }
+        参数完全相同的并发请求只发送一次，其余调用方等待同一个结果
+        """
+        items = params.items() if isinstance(params, dict) else params
+        key = f"{path}?{urlencode(sorted(items))}"
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._request_json(path, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: 单个调用方取消时不影响其他等待者
+        return await asyncio.shield(task)
+
+    async def _amap_get(self, path: str, params, parser, default_error: str, **error_fields) -> dict:
+        """
+        请求高德接口并统一处理返回状态
+
+        Args:
+            parser: status为"1"时用于解析响应数据的函数
+            default_error: 高德未返回info时的错误信息
+            error_fields: 出错时额外附带的字段，如 restaurants=[]
+
+        Returns:
+            parser的结果，或 {"error": 错误信息, **error_fields}
+        """
+        try:
+            data = await self._get_json(path, params)
+        except Exception as e:
+            return {"error": str(e), **error_fields}
+
+        if data.get("status") == "1":
+            return parser(data)
+        return {"error": data.get("info", default_error), **error_fields}
+
+    async def _cached_search(self, path: str, params: list) -> dict:
+        """
+        执行搜索并缓存成功的结果
+
+        调用方会修改返回的结果（如预算过滤），读写缓存时均返回副本
+        """
+        key = (path, tuple(params))
+        cached = self._cache_get(self._search_cache, key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        result = await self._amap_get(
+            path, params, self._parse_search_data, "搜索失败", restaurants=[]
+        )
+        if not result.get("error"):
+            self._cache_put(
+                self._search_cache, key, result, SEARCH_CACHE_TTL, SEARCH_CACHE_SIZE
+            )
+            return copy.deepcopy(result)
+        return result
+
+    def _parse_search_data(self, data: dict) -> dict:
+        """解析搜索接口响应"""
+        return self._parse_poi_results(data.get("pois", []))
+
+    @staticmethod
+    def _normalize_key(value: Optional[str]) -> str:
+        """缓存键归一化：小写、去首尾空白、合并连续空白"""
+        return " ".join(value.lower().split()) if value else ""
+
+    def _geo_cache_key(self, address: str, city: Optional[str]) -> tuple:
+        """地理编码缓存键"""
+        return self._normalize_key(address), self._normalize_key(city)
+
+    @staticmethod
+    def _cache_get(cache: OrderedDict, key):
+        """读取LRU缓存，命中时移到队尾，过期则删除"""
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        expire_at, value = entry
+        if expire_at < time.monotonic():
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return value
+
+    @staticmethod
+    def _cache_put(cache: OrderedDict, key, value, ttl: float, max_size: int = GEO_CACHE_SIZE):
+        """写入LRU缓存，超出容量时淘汰最久未使用的条目"""
+        cache[key] = (time.monotonic() + ttl, value)
+        cache.move_to_end(key)
+        if len(cache) > max_size:
+            cache.popitem(last=False)
 
     async def search_nearby(
         self,
@@ -43,35 +274,18 @@ class FoodAPIService:
         Returns:
             搜索结果
         """
-        params = {
-            "key": self.api_key,
-            "location": location,
-            "radius": radius,
-            "types": "050000",  # 餐饮服务大类
-            "page_num": page,
-            "page_size": min(page_size, 25),
-            "show_fields": "business",
-        }
+        params = [
+            *self._search_base_params,
+            ("location", location),
+            ("radius", radius),
+            ("page_num", page),
+            ("page_size", min(page_size, 25)),
+        ]
 
         if keywords:
-            params["keywords"] = keywords
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/around",
-                    params=params,
-                    timeout=10.0
-                )
-                data = response.json()
-
-                if data.get("status") == "1":
-                    return self._parse_poi_results(data.get("pois", []))
-                else:
-                    return {"error": data.get("info", "搜索失败"), "restaurants": []}
+            params.append(("keywords", keywords))
 
-            except Exception as e:
-                return {"error": str(e), "restaurants": []}
+        return await self._cached_search("/v5/place/around", params)
 
     async def search_by_keyword(
         self,
@@ -92,33 +306,16 @@ class FoodAPIService:
         Returns:
             搜索结果
         """
-        params = {
-            "key": self.api_key,
-            "keywords": keywords,
-            "city": city,
-            "citylimit": "true",
-            "types": "050000",  # 餐饮服务大类
-            "page_num": page,
-            "page_size": min(page_size, 25),
-            "show_fields": "business",
-        }
+        params = [
+            *self._search_base_params,
+            ("keywords", keywords),
+            ("city", city),
+            ("citylimit", "true"),
+            ("page_num", page),
+            ("page_size", min(page_size, 25)),
+        ]
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/text",
-                    params=params,
-                    timeout=10.0
-                )
-                data = response.json()
-
-                if data.get("status") == "1":
-                    return self._parse_poi_results(data.get("pois", []))
-                else:
-                    return {"error": data.get("info", "搜索失败"), "restaurants": []}
-
-            except Exception as e:
-                return {"error": str(e), "restaurants": []}
+        return await self._cached_search("/v5/place/text", params)
 
     async def get_restaurant_detail(self, poi_id: str) -> dict:
         """
@@ -130,34 +327,22 @@ class FoodAPIService:
         Returns:
             餐厅详细信息
         """
-        params = {
-            "key": self.api_key,
-            "id": poi_id,
-            "show_fields": "business",
-        }
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/detail",
-                    params=params,
-                    timeout=10.0
-                )
-                data = response.json()
+        params = [*self._detail_base_params, ("id", poi_id)]
 
-                if data.get("status") == "1" and data.get("pois"):
-                    return self._parse_single_poi(data["pois"][0])
-                else:
-                    return {"error": "未找到餐厅信息"}
+        return await self._amap_get(
+            "/v5/place/detail", params, self._parse_detail_data, "未找到餐厅信息"
+        )
 
-            except Exception as e:
-                return {"error": str(e)}
+    def _parse_detail_data(self, data: dict) -> dict:
+        """解析详情接口响应"""
+        pois = data.get("pois")
+        if pois:
+            return self._parse_single_poi(pois[0])
+        return {"error": "未找到餐厅信息"}
 
     def _parse_poi_results(self, pois: list) -> dict:
         """解析POI搜索结果"""
-        restaurants = []
-        for poi in pois:
-            restaurants.append(self._parse_single_poi(poi))
+        restaurants = [self._parse_single_poi(poi) for poi in pois]
         return {"restaurants": restaurants, "count": len(restaurants)}
 
     def _parse_single_poi(self, poi: dict) -> dict:
@@ -173,48 +358,34 @@ class FoodAPIService:
         - opentime_today: 今日营业时间
         - keytag: 关键标签
         """
-        business = poi.get("business", {})
-
-        # 评分
-        rating = business.get("rating", "") or "暂无"
-
-        # 人均消费
-        cost = business.get("cost", "") or "暂无"
+        poi_get = poi.get
+        business_get = (poi_get("business") or {}).get
 
-        # 电话
-        tel = business.get("tel", "") or "暂无"
-
-        # 营业时间
-        opentime = business.get("opentime_today", "") or "暂无"
-
-        # 标签
-        tag = business.get("tag", "") or ""
-        keytag = business.get("keytag", "") or ""
+        # 类型只取第一级，如"餐饮服务;中餐厅;川菜" -> "餐饮服务"
+        poi_type = poi_get("type")
 
         # 距离
-        distance = poi.get("distance", "")
-        if distance:
-            distance = f"{distance}m"
+        distance = poi_get("distance")
 
         return {
-            "id": poi.get("id", ""),
-            "name": poi.get("name", "未知"),
-            "type": poi.get("type", "").split(";")[0] if poi.get("type") else "餐厅",
-            "address": poi.get("address", "暂无地址"),
-            "location": poi.get("location", ""),
-            "tel": tel,
-            "rating": rating,
-            "cost": cost,
-            "distance": distance,
-            "business_hours": opentime,
-            "tag": tag or keytag,
-            "city": poi.get("cityname", ""),
-            "area": poi.get("adname", ""),
+            "id": poi_get("id", ""),
+            "name": poi_get("name", "未知"),
+            "type": poi_type.partition(";")[0] if poi_type else "餐厅",
+            "address": poi_get("address", "暂无地址"),
+            "location": poi_get("location", ""),
+            "tel": business_get("tel") or "暂无",
+            "rating": business_get("rating") or "暂无",
+            "cost": business_get("cost") or "暂无",
+            "distance": f"{distance}m" if distance else "",
+            "business_hours": business_get("opentime_today") or "暂无",
+            "tag": business_get("tag") or business_get("keytag") or "",
+            "city": poi_get("cityname", ""),
+            "area": poi_get("adname", ""),
         }
 
-    def get_cuisines_by_taste(self, taste: str) -> list:
+    def get_cuisines_by_taste(self, taste: str) -> tuple:
         """根据口味获取推荐关键词"""
-        return self.taste_keywords.get(taste, [])
+        return TASTE_KEYWORDS.get(taste, ())
 
     async def geocode(self, address: str, city: str = None) -> Optional[str]:
         """
@@ -227,6 +398,11 @@ class FoodAPIService:
         Returns:
             坐标字符串 "经度,纬度"，失败返回None
         """
+        cache_key = self._geo_cache_key(address, city)
+        cached = self._cache_get(self._geo_cache, cache_key)
+        if cached:
+            return cached
+
         params = {
             "key": self.api_key,
             "address": address,
@@ -234,21 +410,19 @@ class FoodAPIService:
         if city:
             params["city"] = city
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    "https://restapi.amap.com/v3/geocode/geo",
-                    params=params,
-                    timeout=10.0
-                )
-                data = response.json()
-
-                if data.get("status") == "1" and data.get("geocodes"):
-                    return data["geocodes"][0].get("location")
-                return None
+        result = await self._amap_get(
+            "/v3/geocode/geo", params, self._parse_geocode_data, "地理编码失败"
+        )
+        location = result.get("location")
+        if location:
+            self._cache_put(self._geo_cache, cache_key, location, GEO_CACHE_TTL)
+        return location
 
-            except Exception:
-                return None
+    @staticmethod
+    def _parse_geocode_data(data: dict) -> dict:
+        """解析地理编码接口响应"""
+        geocodes = data.get("geocodes")
+        return {"location": geocodes[0].get("location") if geocodes else None}
 
     async def ip_locate(self, ip: str = None) -> dict:
         """
@@ -264,38 +438,36 @@ class FoodAPIService:
                 "province": "省份"
             }
         """
+        cache_key = self._normalize_key(ip)
+        cached = self._cache_get(self._ip_cache, cache_key)
+        if cached:
+            return dict(cached)
+
         params = {"key": self.api_key}
         if ip:
             params["ip"] = ip
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    "https://restapi.amap.com/v3/ip",
-                    params=params,
-                    timeout=10.0
-                )
-                data = response.json()
-
-                if data.get("status") == "1":
-                    # 高德IP定位可能只返回城市级别，没有精确坐标
-                    rectangle = data.get("rectangle", "")
-                    location = None
-                    if rectangle:
-                        # rectangle格式: "经度1,纬度1;经度2,纬度2"
-                        coords = rectangle.split(";")[0]
-                        location = coords
-
-                    return {
-                        "location": location,
-                        "city": data.get("city", ""),
-                        "province": data.get("province", ""),
-                    }
+        result = await self._amap_get("/v3/ip", params, self._parse_ip_data, "IP定位失败")
+        if result.get("city"):
+            self._cache_put(self._ip_cache, cache_key, result, IP_CACHE_TTL)
+            return dict(result)
+        return result
 
-                return {"error": data.get("info", "IP定位失败")}
+    @staticmethod
+    def _parse_ip_data(data: dict) -> dict:
+        """解析IP定位接口响应"""
+        # 高德IP定位可能只返回城市级别，没有精确坐标
+        rectangle = data.get("rectangle", "")
+        location = None
+        if rectangle:
+            # rectangle格式: "经度1,纬度1;经度2,纬度2"
+            location = rectangle.split(";")[0]
 
-            except Exception as e:
-                return {"error": str(e)}
+        return {
+            "location": location,
+            "city": data.get("city", ""),
+            "province": data.get("province", ""),
+        }
 
     async def resolve_location(
         self,
@@ -318,14 +490,22 @@ class FoodAPIService:
         if location and "," in location and location != "unknown":
             return location, city or default_city
 
-        # 解析地址
         if address:
+            # 地址已有缓存时直接返回，不必发起IP定位
+            cached = self._cache_get(self._geo_cache, self._geo_cache_key(address, city))
+            if cached:
+                return cached, city or default_city
+
+            # IP定位与地址解析同时发起，地址解析成功则丢弃IP定位结果
+            ip_task = asyncio.create_task(self.ip_locate(ip))
             resolved = await self.geocode(address, city)
             if resolved:
+                ip_task.cancel()
                 return resolved, city or default_city
-
-        # IP定位
-        ip_result = await self.ip_locate(ip)
+            ip_result = await ip_task
+        else:
+            # 只有IP定位一个请求，直接await
+            ip_result = await self.ip_locate(ip)
 
         if ip_result.get("city"):
             location = ip_result.get("location")
@@ -338,30 +518,101 @@ class FoodAPIService:
 
         return "unknown", default_city
 
+    @staticmethod
+    def _parse_cost(cost) -> Optional[int]:
+        """解析人均消费为整数，未知或无法解析时返回None"""
+        if not cost or cost == "暂无":
+            return None
+        match = _COST_RE.search(str(cost))
+        return int(match.group()) if match else None
+
     def _filter_by_budget(self, restaurants: list, budget_max: int, include_unknown: bool = True) -> list:
-        """按预算过滤餐厅"""
-        filtered = []
-        for r in restaurants:
-            price = r.get("cost")
-            if price and price != "暂无":
-                try:
-                    price_num = int(float(str(price).replace("元", "").strip()))
-                    if price_num <= budget_max:
-                        filtered.append(r)
-                except (ValueError, TypeError):
-                    if include_unknown:
-                        filtered.append(r)
+        """按预算过滤餐厅（先统一解析价格，再一次性筛选）"""
+        costs = [self._parse_cost(r.get("cost")) for r in restaurants]
+        return [
+            r for r, cost in zip(restaurants, costs)
+            if (cost is None and include_unknown) or (cost is not None and cost <= budget_max)
+        ]
+
+    async def _do_search(
+        self,
+        location: str,
+        keywords: Optional[str],
+        city: str,
+        page_size: int = 20,
+        page: int = 1
+    ) -> dict:
+        """执行搜索"""
+        async with self._semaphore:
+            if location and location != "unknown":
+                return await self.search_nearby(
+                    location=location, keywords=keywords, page=page, page_size=page_size
+                )
             else:
-                if include_unknown:
-                    filtered.append(r)
-        return filtered
+                return await self.search_by_keyword(
+                    keywords=keywords or "美食", city=city, page=page, page_size=page_size
+                )
 
-    async def _do_search(self, location: str, keywords: Optional[str], city: str) -> dict:
-        """执行搜索"""
-        if location and location != "unknown":
-            return await self.search_nearby(location=location, keywords=keywords)
-        else:
-            return await self.search_by_keyword(keywords=keywords or "美食", city=city)
+    async def _do_search_pages(
+        self,
+        location: str,
+        keywords: Optional[str],
+        city: str,
+        page_size: int = 20,
+        pages: int = BUDGET_SEARCH_PAGES
+    ) -> dict:
+        """并发获取前几页结果（并发数受信号量限制），按id去重合并；第一页出错时返回错误"""
+        results = await asyncio.gather(*(
+            self._do_search(location, keywords, city, page_size, page)
+            for page in range(1, pages + 1)
+        ))
+        if results[0].get("error"):
+            return results[0]
+
+        merged = {}
+        for result in results:
+            for r in result.get("restaurants", []):
+                merged.setdefault(r["id"], r)
+        return {"restaurants": list(merged.values()), "count": len(merged)}
+
+    async def _do_multi_search(
+        self,
+        location: str,
+        keywords_list: tuple,
+        city: str,
+        page_size: int = 20
+    ) -> dict:
+        """并发搜索多个关键词，按id去重合并结果；慢的搜索超时后丢弃，保留已返回的结果"""
+        tasks = [
+            asyncio.create_task(self._do_search(location, k, city, page_size))
+            for k in keywords_list
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=MULTI_SEARCH_TIMEOUT)
+        finally:
+            # 超时或调用方取消时，结束仍在进行的搜索
+            for task in tasks:
+                task.cancel()
+
+        # 按id合并，dict保持插入顺序，先到的结果优先
+        merged = {}
+        error = None
+        for task in tasks:
+            if task not in done:
+                error = "搜索超时"
+                continue
+            if task.exception() is not None:
+                error = str(task.exception())
+                continue
+            result = task.result()
+            if result.get("error"):
+                error = result["error"]
+            for r in result.get("restaurants", []):
+                merged.setdefault(r["id"], r)
+
+        if not merged and error:
+            return {"error": error, "restaurants": []}
+        return {"restaurants": list(merged.values()), "count": len(merged)}
 
     async def smart_search(
         self,
@@ -370,24 +621,34 @@ class FoodAPIService:
         cuisine: Optional[str] = None,
         budget_max: Optional[int] = None,
         keywords: Optional[str] = None,
-        city: str = "北京"
+        city: str = "北京",
+        needed: int = 10
     ) -> dict:
         """
         智能搜索 - 综合多个条件搜索餐厅
         简化版：直接用关键词搜索，按预算过滤，不做复杂fallback
+        仅指定口味时，并发搜索该口味对应的多个菜系并合并结果
+
+        Args:
+            needed: 调用方实际展示的数量；无预算过滤时只请求这么多条
         """
         # 确定搜索关键词
         final_keywords = cuisine or keywords
+        cuisines = ()
         if not final_keywords and taste:
-            cuisines = self.get_cuisines_by_taste(taste)
-            if cuisines:
-                final_keywords = cuisines[0]
+            cuisines = self.get_cuisines_by_taste(taste)[:3]
 
-        if not final_keywords:
-            final_keywords = "美食"
+        # 有预算过滤时会筛掉部分结果，仍取整页
+        page_size = 20 if budget_max else needed
 
         # 执行搜索
-        result = await self._do_search(location, final_keywords, city)
+        if cuisines:
+            result = await self._do_multi_search(location, cuisines, city, page_size)
+        elif budget_max:
+            # 预算过滤会筛掉部分结果，多取几页候选
+            result = await self._do_search_pages(location, final_keywords or "美食", city, page_size)
+        else:
+            result = await self._do_search(location, final_keywords or "美食", city, page_size)
         restaurants = result.get("restaurants", [])
 
         if not restaurants:
@@ -3,21 +3,62 @@ LLM服务模块 - 接入阿里云Qwen大模型
 使用OpenAI兼容接口调用DashScope
 """
 
-from openai import OpenAI
-from config import config
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+
+import httpx
+import orjson
+from openai import AsyncOpenAI
+from config import config, HTTP2_ENABLED
+
+# LLM结果缓存：有效期(秒)与最大条目数
+LLM_CACHE_TTL = 86400
+LLM_CACHE_SIZE = 1024
 
 
 class QwenService:
     """Qwen大模型服务"""
 
     def __init__(self):
-        self.client = OpenAI(
+        # 异步客户端，避免LLM调用阻塞事件循环
+        self.client = AsyncOpenAI(
             api_key=config.QWEN_API_KEY,
             base_url=config.QWEN_BASE_URL,
+            max_retries=2,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            http_client=httpx.AsyncClient(http2=HTTP2_ENABLED),
         )
         self.model = config.QWEN_MODEL
+        # 缓存: key -> (过期时间, 结果)
+        self._cache: OrderedDict = OrderedDict()
+
+    def _cache_key(self, *parts: str) -> str:
+        """根据模型和提示词计算缓存键"""
+        raw = "\x00".join((self.model, *parts))
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str):
+        """读取缓存，过期则删除"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expire_at, value = entry
+        if expire_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return value
+
+    def _cache_set(self, key: str, value):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        self._cache[key] = (time.monotonic() + LLM_CACHE_TTL, value)
+        self._cache.move_to_end(key)
+        if len(self._cache) > LLM_CACHE_SIZE:
+            self._cache.popitem(last=False)
 
-    def chat(self, system_prompt: str, user_message: str) -> str:
+    async def chat(self, system_prompt: str, user_message: str) -> str:
         """
         发送聊天请求到Qwen
 
@@ -28,8 +69,14 @@ class QwenService:
         Returns:
             模型回复内容
         """
+        key = self._cache_key(system_prompt, user_message)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
         try:
-            response = self.client.chat.completions.create(
+            # 取原始响应字节用orjson解析，跳过SDK的模型对象构建
+            response = await self.client.chat.completions.with_raw_response.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -38,11 +85,73 @@ class QwenService:
                 temperature=0.7,
                 max_tokens=2000,
             )
-            return response.choices[0].message.content
+            data = orjson.loads(response.content)
+            content = data["choices"][0]["message"]["content"]
+            self._cache_set(key, content)
+            return content
         except Exception as e:
             return f"LLM调用失败: {str(e)}"
 
-    def analyze_food_request(self, user_input: str) -> dict:
+    async def chat_json(self, system_prompt: str, user_message: str) -> str:
+        """
+        流式请求Qwen，读到第一个完整的JSON对象即停止生成
+
+        对象之前的内容（如markdown标记）会被跳过，通过括号深度判断对象结束，
+        字符串内的括号和转义字符不计入深度。
+
+        Returns:
+            JSON对象文本；未读到完整对象时返回收到的全部原始文本，便于排查
+        """
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            temperature=0.7,
+            max_tokens=2000,
+            stream=True,
+        )
+
+        raw = []
+        buf = []
+        depth = 0
+        in_string = False
+        escaped = False
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                raw.append(delta)
+                for ch in delta:
+                    if depth == 0 and ch != "{":
+                        continue
+                    buf.append(ch)
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif ch == "\\":
+                            escaped = True
+                        elif ch == '"':
+                            in_string = False
+                    elif ch == '"':
+                        in_string = True
+                    elif ch == "{":
+                        depth += 1
+                    elif ch == "}":
+                        depth -= 1
+                        if depth == 0:
+                            return "".join(buf)
+        finally:
+            # 提前结束时中断剩余的生成
+            await stream.close()
+
+        return "".join(raw)
+
+    async def analyze_food_request(self, user_input: str) -> dict:
         """
         分析用户的美食需求，提取关键信息
 
@@ -60,29 +169,36 @@ class QwenService:
 }
 只返回JSON，不要其他内容。"""
 
-        response = self.chat(system_prompt, user_input)
+        # 解析结果单独缓存，命中时连JSON解析也跳过
+        key = self._cache_key("analyze", user_input)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
 
-        # 尝试解析JSON
-        import json
         try:
-            # 清理可能的markdown标记
-            cleaned = response.strip()
-            if cleaned.startswith("```"):
-                cleaned = cleaned.split("\n", 1)[1]
-            if cleaned.endswith("```"):
-                cleaned = cleaned.rsplit("```", 1)[0]
-            cleaned = cleaned.strip()
-            return json.loads(cleaned)
-        except json.JSONDecodeError:
-            return {
-                "taste": None,
-                "budget_min": None,
-                "budget_max": None,
-                "cuisine": None,
-                "keywords": [],
-                "meal_time": None,
-                "raw_response": response
-            }
+            response = await self.chat_json(system_prompt, user_input)
+        except Exception as e:
+            response = f"LLM调用失败: {str(e)}"
+
+        # 尝试解析JSON，只有JSON对象才算解析成功
+        try:
+            parsed = orjson.loads(response)
+        except orjson.JSONDecodeError:
+            parsed = None
+
+        if isinstance(parsed, dict):
+            self._cache_set(key, parsed)
+            return copy.deepcopy(parsed)
+        return {
+            "taste": None,
+            "budget_min": None,
+            "budget_max": None,
+            "cuisine": None,
+            "keywords": [],
+            "meal_time": None,
+            # 仅保留开头部分便于排查，不持有完整回复
+            "raw_response": response[:200]
+        }
 
 
 # 单例
@@ -3,6 +3,7 @@
 接收主控Agent的结构化请求，执行skill并返回结果
 """
 
+import asyncio
 import json
 import uuid
 from datetime import datetime
@@ -13,6 +14,11 @@ from contextlib import asynccontextmanager
 
 from config import config
 from food_api_service import food_api_service
+from llm_service import qwen_service
+
+
+# 每次回复最多展示的餐厅数量
+RESULT_LIMIT = 10
 
 
 # ==================== Skill 实现 ====================
@@ -40,7 +46,7 @@ class FoodAgentSkills:
             lines.append(f"   电话: {r.get('tel')}")
         return "\n".join(lines)
 
-    def _format_restaurant_list(self, restaurants: list, limit: int = 10) -> str:
+    def _format_restaurant_list(self, restaurants: list, limit: int = RESULT_LIMIT) -> str:
         """格式化餐厅列表"""
         result = []
         for i, r in enumerate(restaurants[:limit], 1):
@@ -76,35 +82,42 @@ class FoodAgentSkills:
         - address: 地址
         - city: 城市
         - ip: IP地址
+        - user_input: 用户原始描述（可选，由LLM解析补充上述条件）
         """
+        # 解析位置，同时用LLM解析用户描述（两者互不依赖）
+        (location, city), parsed = await asyncio.gather(
+            self.api.resolve_location(
+                location=params.get("location"),
+                address=params.get("address"),
+                city=params.get("city"),
+                ip=params.get("ip")
+            ),
+            self._analyze_user_input(params.get("user_input"))
+        )
+        params = self._merge_parsed_params(params, parsed)
+
         taste = params.get("taste")
         budget_max = params.get("budget_max")
         cuisine = params.get("cuisine") or params.get("category")
 
-        # 解析位置
-        location, city = await self.api.resolve_location(
-            location=params.get("location"),
-            address=params.get("address"),
-            city=params.get("city"),
-            ip=params.get("ip")
-        )
-
         # 调用智能搜索
         result = await self.api.smart_search(
             location=location,
             taste=taste,
             cuisine=cuisine,
             budget_max=int(budget_max) if budget_max else None,
-            city=city
+            city=city,
+            needed=RESULT_LIMIT
         )
 
         restaurants = result.get("restaurants", [])
+        conditions = self._condition_suffix(taste, budget_max, cuisine)
 
         if not restaurants:
-            return self._no_result_message(taste=taste, budget=budget_max, cuisine=cuisine)
+            return self._no_result_message(conditions)
 
         # 构建响应
-        header = self._build_header(params, len(restaurants))
+        header = self._build_header(conditions, len(restaurants))
         body = self._format_restaurant_list(restaurants)
 
         response = f"{header}\n\n{body}"
@@ -115,20 +128,45 @@ class FoodAgentSkills:
 
         return response
 
-    def _build_header(self, params: dict, count: int) -> str:
-        """构建响应头"""
+    async def _analyze_user_input(self, user_input: Optional[str]) -> dict:
+        """用LLM解析用户描述，未提供或解析失败时返回空字典"""
+        if not user_input:
+            return {}
+        try:
+            parsed = await qwen_service.analyze_food_request(user_input)
+        except Exception:
+            return {}
+        return parsed if isinstance(parsed, dict) else {}
+
+    def _merge_parsed_params(self, params: dict, parsed: dict) -> dict:
+        """用LLM解析结果补充缺失的条件，显式传入的参数优先"""
+        merged = dict(params)
+        # LLM输出不可信，口味/菜系只接受非空字符串
+        taste = parsed.get("taste")
+        if not merged.get("taste") and taste and isinstance(taste, str):
+            merged["taste"] = taste
+        cuisine = parsed.get("cuisine")
+        if not (merged.get("cuisine") or merged.get("category")) and cuisine and isinstance(cuisine, str):
+            merged["cuisine"] = cuisine
+        budget_max = parsed.get("budget_max")
+        if not merged.get("budget_max") and str(budget_max or "").isdigit():
+            merged["budget_max"] = int(budget_max)
+        return merged
+
+    def _condition_suffix(self, taste=None, budget=None, cuisine=None) -> str:
+        """拼接筛选条件说明，如" (口味:辣, 预算:80元内)"，无条件时为空串"""
         conditions = []
-        if params.get("taste"):
-            conditions.append(f"口味:{params['taste']}")
-        if params.get("budget_max"):
-            conditions.append(f"预算:{params['budget_max']}元内")
-        cuisine = params.get("cuisine") or params.get("category")
+        if taste:
+            conditions.append(f"口味:{taste}")
+        if budget:
+            conditions.append(f"预算:{budget}元内")
         if cuisine:
             conditions.append(f"菜系:{cuisine}")
+        return f" ({', '.join(conditions)})" if conditions else ""
 
-        if conditions:
-            return f"为您找到 {count} 家餐厅 ({', '.join(conditions)})"
-        return f"为您找到 {count} 家餐厅"
+    def _build_header(self, conditions: str, count: int) -> str:
+        """构建响应头"""
+        return f"为您找到 {count} 家餐厅{conditions}"
 
     async def search(self, params: dict) -> str:
         """
@@ -189,21 +227,9 @@ class FoodAgentSkills:
 
         return "未找到该餐厅信息，请检查餐厅名称是否正确。"
 
-    def _no_result_message(self, taste=None, budget=None, cuisine=None) -> str:
+    def _no_result_message(self, conditions: str = "") -> str:
         """无结果时的提示信息"""
-        conditions = []
-        if taste:
-            conditions.append(f"口味:{taste}")
-        if budget:
-            conditions.append(f"预算:{budget}元内")
-        if cuisine:
-            conditions.append(f"菜系:{cuisine}")
-
-        msg = "未找到符合条件的餐厅"
-        if conditions:
-            msg += f" ({', '.join(conditions)})"
-        msg += "，建议放宽条件重试。"
-        return msg
+        return f"未找到符合条件的餐厅{conditions}，建议放宽条件重试。"
 
 
 # ==================== A2A Agent ====================
@@ -269,6 +295,8 @@ async def lifespan(app: FastAPI):
     print("Skills: recommend, search, detail")
     print("=" * 50)
     yield
+    await food_api_service.aclose()
+    await qwen_service.client.close()
     print("外卖助手Agent 关闭")
 
 
@@ -8,8 +8,15 @@ from dotenv import load_dotenv
 # 加载.env文件
 load_dotenv()
 
+# httpx的HTTP/2支持依赖h2，未安装时退回HTTP/1.1长连接
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class Config:
     # 阿里云 Qwen API配置 (DashScope)
     # 获取方式: https://dashscope.console.aliyun.com/
@@ -3,9 +3,22 @@
 百度地图Web服务API文档: https://lbsyun.baidu.com/faq/api?title=webapi/guide/webservice-placeapi
 """
 
+import asyncio
+import re
+import time
 import httpx
+import orjson
+from collections import OrderedDict
 from typing import Optional, Tuple
-from config import config
+from urllib.parse import urlencode
+from config import config, HTTP2_ENABLED
+
+# 地理编码缓存：有效期(秒)与最大条目数
+GEOCODE_CACHE_TTL = 86400
+GEOCODE_CACHE_SIZE = 1024
+
+# 人均价格：整个字符串须为单个数字（如"45.5元" -> 45），"1,200"、"80-150"等视为无法解析
+_PRICE_RE = re.compile(r"\s*(\d+)(?:\.\d+)?\s*元?\s*")
 
 
 class FoodAPIService:
@@ -14,31 +27,97 @@ class FoodAPIService:
     def __init__(self):
         self.ak = config.BAIDU_MAP_AK
         self.base_url = "https://api.map.baidu.com"
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # 固定不变的查询参数预先编码，每次请求只编码变化的部分
+        self._nearby_qs = urlencode({
+            "ak": self.ak,
+            "scope": 2,  # 返回详细信息
+            "output": "json",
+            "coord_type": 2,  # GCJ-02坐标，百度自动转换
+        })
+        self._keyword_qs = urlencode({
+            "ak": self.ak,
+            "scope": 2,
+            "output": "json",
+            "city_limit": "true",
+        })
+
+        # 地理编码缓存 (LRU): (地址, 城市) -> (写入时间, 坐标)
+        self._geocode_cache: OrderedDict = OrderedDict()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取共享的HTTP客户端（首次使用时创建，复用连接池）"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2_ENABLED,
+                timeout=httpx.Timeout(10.0, connect=2.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def aclose(self):
+        """关闭HTTP客户端，释放连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
 
     def swap_coord_order(self, amap_location: str) -> str:
         """
         交换坐标顺序：高德(经度,纬度) -> 百度(纬度,经度)
         坐标系转换由百度API的coord_type=2参数自动处理
         """
-        try:
-            parts = amap_location.split(",")
-            if len(parts) == 2:
-                return f"{parts[1]},{parts[0]}"  # 交换顺序
-        except Exception:
-            pass
-        return amap_location
-
-    async def geocode(self, address: str, city: str = "") -> Optional[str]:
+        if not amap_location:
+            return amap_location
+        i = amap_location.find(",")
+        if i < 0 or amap_location.find(",", i + 1) >= 0:
+            return amap_location
+        return amap_location[i + 1:] + "," + amap_location[:i]  # 交换顺序
+
+    def _get_cached_geocode(self, key: tuple) -> Optional[str]:
+        """读取地理编码缓存，过期则删除"""
+        entry = self._geocode_cache.get(key)
+        if entry is None:
+            return None
+        cached_at, location = entry
+        if time.monotonic() - cached_at > GEOCODE_CACHE_TTL:
+            del self._geocode_cache[key]
+            return None
+        self._geocode_cache.move_to_end(key)
+        return location
+
+    def _set_cached_geocode(self, key: tuple, location: str):
+        """写入地理编码缓存，超出容量时淘汰最久未使用的条目"""
+        self._geocode_cache[key] = (time.monotonic(), location)
+        self._geocode_cache.move_to_end(key)
+        if len(self._geocode_cache) > GEOCODE_CACHE_SIZE:
+            self._geocode_cache.popitem(last=False)
+
+    async def geocode(self, address: str, city: str = "", use_cache: bool = True) -> Optional[str]:
         """
         地理编码：地址 -> 坐标
 
         Args:
             address: 地址，如"新街口"、"南京大学"
             city: 城市，提高精度
+            use_cache: 是否使用缓存
 
         Returns:
             坐标字符串 "纬度,经度" (百度格式)，失败返回None
         """
+        key = (address, city or "")
+        if use_cache:
+            cached = self._get_cached_geocode(key)
+            if cached:
+                return cached
+
         params = {
             "ak": self.ak,
             "address": address,
@@ -47,23 +126,64 @@ class FoodAPIService:
         if city:
             params["city"] = city
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/geocoding/v3/",
-                    params=params,
-                    timeout=10.0
-                )
-                data = response.json()
-
-                if data.get("status") == 0 and data.get("result"):
-                    loc = data["result"]["location"]
-                    return f"{loc['lat']},{loc['lng']}"
-            except Exception as e:
-                print(f"地理编码失败: {e}")
+        try:
+            response = await self._get_client().get("/geocoding/v3/", params=params)
+            data = orjson.loads(response.content)
+
+            if data.get("status") == 0 and data.get("result"):
+                loc = data["result"]["location"]
+                location = f"{loc['lat']},{loc['lng']}"
+                self._set_cached_geocode(key, location)
+                return location
+        except Exception as e:
+            print(f"地理编码失败: {e}")
 
         return None
 
+    async def batch_geocode(self, addresses: list, city: str = "") -> list:
+        """
+        批量地理编码：多个地址并发解析
+
+        Args:
+            addresses: 地址列表
+            city: 城市，提高精度
+
+        Returns:
+            与addresses一一对应的坐标列表 ("纬度,经度" 百度格式)，失败的为None
+        """
+        # 并发请求同时开始，重复地址命中不了彼此的缓存，先去重再解析
+        unique = list(dict.fromkeys(addresses))
+        results = await asyncio.gather(
+            *(self.geocode(address, city) for address in unique),
+            return_exceptions=True
+        )
+        resolved = {
+            address: None if isinstance(r, BaseException) else r
+            for address, r in zip(unique, results)
+        }
+        return [resolved[address] for address in addresses]
+
+    async def _search(self, base_qs: str, params: dict) -> dict:
+        """
+        执行POI检索请求并解析结果
+
+        Args:
+            base_qs: 预先编码的固定查询参数
+            params: 本次请求变化的参数
+        """
+        try:
+            url = f"/place/v2/search?{base_qs}&{urlencode(params)}"
+            response = await self._get_client().get(url)
+            data = orjson.loads(response.content)
+
+            if data.get("status") == 0:
+                return self._parse_poi_results(data.get("results", []))
+            else:
+                return {"error": data.get("message", "搜索失败"), "restaurants": []}
+
+        except Exception as e:
+            return {"error": str(e), "restaurants": []}
+
     async def search_nearby(
         self,
         location: str,
@@ -91,41 +211,17 @@ class FoodAPIService:
         baidu_location = self.swap_coord_order(location)
 
         params = {
-            "ak": self.ak,
             "location": baidu_location,
             "radius": min(radius, 50000),
-            "scope": 2,  # 返回详细信息
-            "output": "json",
             "page_num": page,
             "page_size": min(page_size, 20),
-            "coord_type": 2,  # GCJ-02坐标，百度自动转换
+            "query": query or "美食",
         }
 
-        # 设置搜索关键词
-        if query:
-            params["query"] = query
-        else:
-            params["query"] = "美食"
-
         if tag:
             params["tag"] = tag
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/place/v2/search",
-                    params=params,
-                    timeout=10.0
-                )
-                data = response.json()
-
-                if data.get("status") == 0:
-                    return self._parse_poi_results(data.get("results", []))
-                else:
-                    return {"error": data.get("message", "搜索失败"), "restaurants": []}
-
-            except Exception as e:
-                return {"error": str(e), "restaurants": []}
+        return await self._search(self._nearby_qs, params)
 
     async def search_by_keyword(
         self,
@@ -149,12 +245,8 @@ class FoodAPIService:
             搜索结果
         """
         params = {
-            "ak": self.ak,
             "query": keywords,
             "region": city,
-            "city_limit": "true",
-            "scope": 2,
-            "output": "json",
             "page_num": page,
             "page_size": min(page_size, 20),
         }
@@ -162,22 +254,7 @@ class FoodAPIService:
         if tag:
             params["tag"] = tag
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/place/v2/search",
-                    params=params,
-                    timeout=10.0
-                )
-                data = response.json()
-
-                if data.get("status") == 0:
-                    return self._parse_poi_results(data.get("results", []))
-                else:
-                    return {"error": data.get("message", "搜索失败"), "restaurants": []}
-
-            except Exception as e:
-                return {"error": str(e), "restaurants": []}
+        return await self._search(self._keyword_qs, params)
 
     async def get_restaurant_detail(self, uid: str) -> dict:
         """
@@ -196,28 +273,21 @@ class FoodAPIService:
             "output": "json",
         }
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/place/v2/detail",
-                    params=params,
-                    timeout=10.0
-                )
-                data = response.json()
+        try:
+            response = await self._get_client().get("/place/v2/detail", params=params)
+            data = orjson.loads(response.content)
 
-                if data.get("status") == 0 and data.get("result"):
-                    return self._parse_single_poi(data["result"])
-                else:
-                    return {"error": "未找到餐厅信息"}
+            if data.get("status") == 0 and data.get("result"):
+                return self._parse_single_poi(data["result"])
+            else:
+                return {"error": "未找到餐厅信息"}
 
-            except Exception as e:
-                return {"error": str(e)}
+        except Exception as e:
+            return {"error": str(e)}
 
     def _parse_poi_results(self, results: list) -> dict:
         """解析POI搜索结果"""
-        restaurants = []
-        for poi in results:
-            restaurants.append(self._parse_single_poi(poi))
+        restaurants = [self._parse_single_poi(poi) for poi in results]
         return {"restaurants": restaurants, "count": len(restaurants)}
 
     def _parse_single_poi(self, poi: dict) -> dict:
@@ -237,47 +307,37 @@ class FoodAPIService:
             ...
         }
         """
-        detail = poi.get("detail_info", {})
-
-        # 评分
-        rating = detail.get("overall_rating", "")
-        if not rating:
-            rating = "暂无"
-
-        # 人均消费
-        price = detail.get("price", "")
-        if not price:
-            price = "暂无"
-
-        # 电话
-        tel = poi.get("telephone", "") or "暂无"
+        detail = poi.get("detail_info") or {}
 
-        # 营业时间
-        shop_hours = detail.get("shop_hours", "") or "暂无"
+        # 人均消费，同时解析出数值供预算筛选
+        price = detail.get("price")
+        cost_num = None
+        if price:
+            match = _PRICE_RE.fullmatch(str(price))
+            if match:
+                cost_num = int(match.group(1))
 
         # 标签
-        tag = detail.get("tag", "")
+        tag = detail.get("tag") or ""
 
-        # 解析距离 (百度返回的是米数)
-        distance = detail.get("distance", "")
-        if distance:
-            distance = f"{distance}m"
+        # 距离 (百度返回的是米数)
+        distance = detail.get("distance")
 
         # 位置
-        location = poi.get("location", {})
-        location_str = f"{location.get('lng', '')},{location.get('lat', '')}" if location else ""
+        location = poi.get("location")
 
         return {
             "id": poi.get("uid", ""),
             "name": poi.get("name", "未知"),
-            "type": tag.split(";")[0] if tag else "餐厅",
+            "type": tag.partition(";")[0] if tag else "餐厅",
             "address": poi.get("address", "暂无地址"),
-            "location": location_str,
-            "tel": tel,
-            "rating": rating,
-            "cost": price,
-            "distance": distance,
-            "business_hours": shop_hours,
+            "location": f"{location.get('lng', '')},{location.get('lat', '')}" if location else "",
+            "tel": poi.get("telephone") or "暂无",
+            "rating": detail.get("overall_rating") or "暂无",
+            "cost": price or "暂无",
+            "cost_num": cost_num,
+            "distance": f"{distance}m" if distance else "",
+            "business_hours": detail.get("shop_hours") or "暂无",
             "tag": tag,
             "city": poi.get("city", ""),
             "area": poi.get("area", ""),
@@ -287,17 +347,10 @@ class FoodAPIService:
         """
         按预算严格过滤餐厅（不包含价格未知的）
         """
-        filtered = []
-        for r in restaurants:
-            price = r.get("cost")
-            if price and price != "暂无":
-                try:
-                    price_num = int(float(str(price).replace("元", "").strip()))
-                    if price_num <= budget_max:
-                        filtered.append(r)
-                except (ValueError, TypeError):
-                    pass  # 解析失败的不包含
-        return filtered
+        return [
+            r for r in restaurants
+            if r["cost_num"] is not None and r["cost_num"] <= budget_max
+        ]
 
     async def unified_search(
         self,
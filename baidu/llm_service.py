@@ -3,8 +3,28 @@ LLM服务模块 - 接入阿里云Qwen大模型
 使用OpenAI兼容接口调用DashScope
 """
 
-from openai import OpenAI
-from config import config
+import copy
+import re
+from collections import OrderedDict
+
+import httpx
+import orjson
+from openai import AsyncOpenAI, OpenAI
+from config import config, HTTP2_ENABLED
+
+# 需求解析结果缓存最大条目数
+PARSE_CACHE_SIZE = 4096
+
+# 推荐文案输出上限: 基础token数 + 每家餐厅token数
+RECOMMEND_BASE_TOKENS = 120
+RECOMMEND_TOKENS_PER_RESTAURANT = 90
+# 推荐文案采用较低温度，输出更短更稳定
+RECOMMEND_TEMPERATURE = 0.3
+# 无餐厅数据时的固定回复，无需调用LLM
+NO_RESULT_REPLY = "未找到符合条件的餐厅，建议放宽条件重试。"
+
+# LLM回复中包裹JSON的markdown代码块标记（开头整行，含任意语言标签）
+_FENCE_RE = re.compile(r"\A```[^\n]*\n?|\s*```\Z")
 
 
 class QwenService:
@@ -15,7 +35,22 @@ class QwenService:
             api_key=config.QWEN_API_KEY,
             base_url=config.QWEN_BASE_URL,
         )
+        # 异步客户端，供async调用方使用，避免阻塞事件循环
+        self.aclient = AsyncOpenAI(
+            api_key=config.QWEN_API_KEY,
+            base_url=config.QWEN_BASE_URL,
+            max_retries=2,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            http_client=httpx.AsyncClient(http2=HTTP2_ENABLED),
+        )
         self.model = config.QWEN_MODEL
+        # 需求解析缓存: 规范化输入 -> 解析结果 (LRU)
+        self._parse_cache: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def _normalize_input(user_input: str) -> str:
+        """规范化用户输入作为缓存键：合并空白、统一小写"""
+        return " ".join(user_input.split()).lower()
 
     def chat(self, system_prompt: str, user_message: str) -> str:
         """
@@ -42,7 +77,71 @@ class QwenService:
         except Exception as e:
             return f"LLM调用失败: {str(e)}"
 
-    def analyze_food_request(self, user_input: str) -> dict:
+    async def achat(self, system_prompt: str, user_message: str,
+                    temperature: float = 0.7, max_tokens: int = 2000) -> str:
+        """
+        发送聊天请求到Qwen (异步版本)
+
+        Args:
+            system_prompt: 系统提示词
+            user_message: 用户消息
+            temperature: 采样温度
+            max_tokens: 最大输出token数
+
+        Returns:
+            模型回复内容
+        """
+        try:
+            response = await self.aclient.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            return f"LLM调用失败: {str(e)}"
+
+    async def astream_chat(self, system_prompt: str, user_message: str,
+                           temperature: float = 0.7, max_tokens: int = 2000):
+        """
+        流式发送聊天请求到Qwen，逐段产出模型回复
+
+        Args:
+            system_prompt: 系统提示词
+            user_message: 用户消息
+            temperature: 采样温度
+            max_tokens: 最大输出token数
+
+        Yields:
+            模型回复的增量文本
+        """
+        try:
+            stream = await self.aclient.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+        except Exception as e:
+            yield f"LLM调用失败: {str(e)}"
+            return
+
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+    async def analyze_food_request(self, user_input: str) -> dict:
         """
         分析用户的美食需求，提取关键信息
 
@@ -60,20 +159,21 @@ class QwenService:
 }
 只返回JSON，不要其他内容。"""
 
-        response = self.chat(system_prompt, user_input)
+        key = self._normalize_input(user_input)
+        cached = self._parse_cache.get(key)
+        if cached is not None:
+            self._parse_cache.move_to_end(key)
+            return copy.deepcopy(cached)
+
+        response = await self.achat(system_prompt, user_input)
 
-        # 尝试解析JSON
-        import json
+        # 尝试解析JSON（先清理可能的markdown标记），只有JSON对象才算解析成功
         try:
-            # 清理可能的markdown标记
-            cleaned = response.strip()
-            if cleaned.startswith("```"):
-                cleaned = cleaned.split("\n", 1)[1]
-            if cleaned.endswith("```"):
-                cleaned = cleaned.rsplit("```", 1)[0]
-            cleaned = cleaned.strip()
-            return json.loads(cleaned)
-        except json.JSONDecodeError:
+            parsed = orjson.loads(_FENCE_RE.sub("", response.strip()))
+        except orjson.JSONDecodeError:
+            parsed = None
+
+        if not isinstance(parsed, dict):
             return {
                 "taste": None,
                 "budget_min": None,
@@ -81,10 +181,17 @@ class QwenService:
                 "cuisine": None,
                 "keywords": [],
                 "meal_time": None,
-                "raw_response": response
+                # 仅保留开头部分便于排查，不持有完整回复
+                "raw_response": response[:200]
             }
 
-    def generate_recommendation(self, user_input: str, restaurants: list) -> str:
+        # 仅缓存解析成功的结果
+        self._parse_cache[key] = parsed
+        if len(self._parse_cache) > PARSE_CACHE_SIZE:
+            self._parse_cache.popitem(last=False)
+        return copy.deepcopy(parsed)
+
+    async def generate_recommendation(self, user_input: str, restaurants: list) -> str:
         """
         根据餐厅数据生成智能推荐文案
 
@@ -95,6 +202,34 @@ class QwenService:
         Returns:
             格式化的推荐文案
         """
+        if not restaurants:
+            return NO_RESULT_REPLY
+        return await self.achat(
+            *self._recommendation_prompt(user_input, restaurants),
+            temperature=RECOMMEND_TEMPERATURE,
+            max_tokens=self._recommendation_max_tokens(restaurants)
+        )
+
+    async def astream_recommendation(self, user_input: str, restaurants: list):
+        """流式生成推荐文案，参数同generate_recommendation"""
+        if not restaurants:
+            yield NO_RESULT_REPLY
+            return
+        async for delta in self.astream_chat(
+            *self._recommendation_prompt(user_input, restaurants),
+            temperature=RECOMMEND_TEMPERATURE,
+            max_tokens=self._recommendation_max_tokens(restaurants)
+        ):
+            yield delta
+
+    @staticmethod
+    def _recommendation_max_tokens(restaurants: list) -> int:
+        """按提供给LLM的餐厅数量(最多5家)估算推荐文案的输出上限"""
+        count = min(len(restaurants), 5)
+        return RECOMMEND_BASE_TOKENS + RECOMMEND_TOKENS_PER_RESTAURANT * count
+
+    def _recommendation_prompt(self, user_input: str, restaurants: list) -> tuple:
+        """构建推荐文案的(系统提示词, 用户消息)"""
         system_prompt = """你是一个专业的美食推荐助手。请根据用户的需求和提供的餐厅数据，生成友好、专业的推荐回复。
 
 要求：
@@ -104,7 +239,19 @@ class QwenService:
 4. 如果数据较少，可以适当补充建议
 5. 回复使用中文"""
 
-        # 构建餐厅信息
+        restaurant_info = self._build_restaurant_info(restaurants)
+
+        user_message = f"""用户需求: {user_input}
+
+可选餐厅数据:
+{restaurant_info if restaurant_info else "暂无匹配的餐厅数据"}
+
+请生成推荐回复。"""
+
+        return system_prompt, user_message
+
+    def _build_restaurant_info(self, restaurants: list) -> str:
+        """构建提供给LLM的餐厅信息文本"""
         restaurant_info = ""
         for i, r in enumerate(restaurants[:5], 1):
             restaurant_info += f"""
@@ -117,17 +264,9 @@ class QwenService:
 - 距离: {r.get('distance', '未知')}
 - 电话: {r.get('tel', '暂无')}
 """
+        return restaurant_info
 
-        user_message = f"""用户需求: {user_input}
-
-可选餐厅数据:
-{restaurant_info if restaurant_info else "暂无匹配的餐厅数据"}
-
-请生成推荐回复。"""
-
-        return self.chat(system_prompt, user_message)
-
-    def generate_detail_description(self, restaurant: dict) -> str:
+    async def generate_detail_description(self, restaurant: dict) -> str:
         """
         为餐厅生成详细描述
 
@@ -150,7 +289,7 @@ class QwenService:
 营业时间: {restaurant.get('business_hours', '暂无')}
 """
 
-        return self.chat(system_prompt, f"请为以下餐厅生成介绍:\n{restaurant_info}")
+        return await self.achat(system_prompt, f"请为以下餐厅生成介绍:\n{restaurant_info}")
 
 
 # 单例
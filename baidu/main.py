@@ -3,16 +3,38 @@
 统一搜索接口，支持地点名、预算筛选、外卖筛选
 """
 
-import json
+import asyncio
+import os
+import time
 import uuid
+import orjson
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
 
 from config import config
 from food_api_service import food_api_service
+from llm_service import qwen_service
+
+# 任务结果保留时长(秒)与最大条数
+TASK_TTL = 3600
+TASK_MAX = 10_000
+
+# 当前秒的ISO时间串: [秒, 字符串]，同一秒内复用
+_now_iso_cache = [0, ""]
+
+
+def _now_iso() -> str:
+    """返回秒级精度的当前ISO时间，同一秒内不重复格式化"""
+    now = int(time.time())
+    if now != _now_iso_cache[0]:
+        _now_iso_cache[0] = now
+        _now_iso_cache[1] = datetime.fromtimestamp(now).isoformat()
+    return _now_iso_cache[1]
 
 
 # ==================== Skill 实现 ====================
@@ -23,39 +45,44 @@ class FoodAgentSkills:
     def __init__(self):
         self.api = food_api_service
         self.default_city = "南京"
+        # 进行中的搜索: 搜索条件 -> Task
+        self._inflight: dict[tuple, asyncio.Task] = {}
 
     def _format_restaurant(self, r: dict, index: int = None) -> str:
         """格式化单个餐厅信息"""
+        get = r.get
+        typ, rating, cost, distance, tel = (
+            get('type'), get('rating'), get('cost'), get('distance'), get('tel')
+        )
         prefix = f"{index}. " if index else ""
-        lines = [f"**{prefix}{r.get('name', '未知')}**"]
+        lines = [f"**{prefix}{get('name', '未知')}**"]
 
         # 基本信息
         info_parts = []
-        if r.get('type') and r.get('type') != '餐厅':
-            info_parts.append(r.get('type'))
-        if r.get('rating') and r.get('rating') != '暂无':
-            info_parts.append(f"评分:{r.get('rating')}")
-        if r.get('cost') and r.get('cost') != '暂无':
-            info_parts.append(f"人均:{r.get('cost')}元")
-        if r.get('distance'):
-            info_parts.append(r.get('distance'))
+        if typ and typ != '餐厅':
+            info_parts.append(typ)
+        if rating and rating != '暂无':
+            info_parts.append(f"评分:{rating}")
+        if cost and cost != '暂无':
+            info_parts.append(f"人均:{cost}元")
+        if distance:
+            info_parts.append(distance)
 
         if info_parts:
             lines.append(f"   {' | '.join(info_parts)}")
 
-        lines.append(f"   {r.get('address', '暂无地址')}")
+        lines.append(f"   {get('address', '暂无地址')}")
 
-        if r.get('tel') and r.get('tel') != '暂无':
-            lines.append(f"   电话: {r.get('tel')}")
+        if tel and tel != '暂无':
+            lines.append(f"   电话: {tel}")
 
         return "\n".join(lines)
 
     def _format_restaurant_list(self, restaurants: list, limit: int = 10) -> str:
         """格式化餐厅列表"""
-        result = []
-        for i, r in enumerate(restaurants[:limit], 1):
-            result.append(self._format_restaurant(r, i))
-        return "\n\n".join(result)
+        return "\n\n".join(
+            self._format_restaurant(r, i) for i, r in enumerate(restaurants[:limit], 1)
+        )
 
     async def search(self, params: dict) -> str:
         """
@@ -69,43 +96,102 @@ class FoodAgentSkills:
         - budget_max: 预算上限（严格筛选）
         - delivery_only: 是否只看外卖（true/false）
         """
+        text, _ = await self._search(params)
+        return text
+
+    async def search_stream(self, params: dict):
+        """
+        流式搜索：先产出搜索结果，再逐段产出LLM推荐语
+
+        params: 同search，另支持
+        - user_input: 用户原始描述，用于生成推荐语（缺省使用query）
+        """
+        text, restaurants = await self._search(params)
+        yield text
+
+        if restaurants:
+            user_input = params.get("user_input") or params.get("query") or params.get("keyword")
+            yield "\n\n"
+            async for delta in qwen_service.astream_recommendation(user_input, restaurants):
+                yield delta
+
+    async def _search(self, params: dict) -> tuple:
+        """
+        执行搜索，返回(格式化文本, 餐厅列表)
+
+        条件完全相同的并发请求只搜索一次，其余调用方等待同一个结果
+        """
         query = params.get("query") or params.get("keyword") or params.get("cuisine")
         if not query:
-            return "请输入搜索内容（如：火锅、海底捞、日料...）"
-
-        # 调用统一搜索
-        result = await self.api.unified_search(
-            query=query,
-            location=params.get("location"),
-            location_name=params.get("location_name"),
-            city=params.get("city", self.default_city),
-            budget_max=int(params["budget_max"]) if params.get("budget_max") else None,
-            delivery_only=bool(params.get("delivery_only")),
-            radius=int(params.get("radius", 3000))
-        )
+            return "请输入搜索内容（如：火锅、海底捞、日料...）", []
+
+        search_kwargs = {
+            "query": query,
+            "location": params.get("location"),
+            "location_name": params.get("location_name"),
+            "city": params.get("city", self.default_city),
+            "budget_max": int(params["budget_max"]) if params.get("budget_max") else None,
+            "delivery_only": bool(params.get("delivery_only")),
+            "radius": int(params.get("radius", 3000)),
+        }
+        # 参数来自客户端，可能是列表等不可哈希的值，统一转为字符串作键
+        key = tuple(map(repr, search_kwargs.values()))
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_search(search_kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: 单个调用方取消时不影响其他等待者
+        return await asyncio.shield(task)
+
+    async def _run_search(self, search_kwargs: dict) -> tuple:
+        """调用统一搜索并格式化结果"""
+        query = search_kwargs["query"]
+        result = await self.api.unified_search(**search_kwargs)
 
         restaurants = result.get("restaurants", [])
         search_info = result.get("search_info", "")
 
         if not restaurants:
-            return f"未找到结果（{search_info}）\n\n建议：\n- 尝试其他关键词\n- 放宽预算限制\n- 扩大搜索范围"
+            return f"未找到结果（{search_info}）\n\n建议：\n- 尝试其他关键词\n- 放宽预算限制\n- 扩大搜索范围", []
 
         header = f"搜索「{query}」找到 {len(restaurants)} 家餐厅"
         if search_info:
             header = f"{search_info}\n{header}"
 
         body = self._format_restaurant_list(restaurants)
-        return f"{header}\n\n{body}"
+        return f"{header}\n\n{body}", restaurants
 
 
 # ==================== A2A Agent ====================
 
+@dataclass(slots=True)
+class A2ARequest:
+    """A2A JSON-RPC请求信封"""
+    id: Optional[Union[str, int]] = None
+    method: Optional[str] = None
+    params: dict = field(default_factory=dict)
+
+    @classmethod
+    def parse(cls, raw: bytes) -> "A2ARequest":
+        """解析并校验请求体，JSON无效时抛出orjson.JSONDecodeError，结构无效时抛出ValueError"""
+        body = orjson.loads(raw)
+        if not isinstance(body, dict):
+            raise ValueError("请求体必须是JSON对象")
+        params = body.get("params") or {}
+        if not isinstance(params, dict):
+            raise ValueError("params必须是JSON对象")
+        return cls(id=body.get("id"), method=body.get("method"), params=params)
+
+
 class FoodDeliveryAgent:
     """外卖助手A2A Agent"""
 
     def __init__(self):
         self.skills = FoodAgentSkills()
-        self.tasks = {}
+        # 任务结果: task_id -> (保存时间, 任务)，按保存时间先后排列
+        self.tasks: OrderedDict = OrderedDict()
 
         # 简化为单一搜索技能
         self.skill_handlers = {
@@ -114,12 +200,41 @@ class FoodDeliveryAgent:
             "recommend": self.skills.search,
             "detail": self.skills.search,
         }
+        # 流式处理，技能与skill_handlers一一对应
+        self.stream_handlers = {
+            skill_id: self.skills.search_stream for skill_id in self.skill_handlers
+        }
 
-    def load_agent_card(self) -> dict:
-        import os
+        # 启动时读取一次agent card，请求时直接返回
         card_path = os.path.join(os.path.dirname(__file__), "agent_card.json")
-        with open(card_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(card_path, "rb") as f:
+            self._agent_card = orjson.loads(f.read())
+
+    def load_agent_card(self) -> dict:
+        return self._agent_card
+
+    def get_task(self, task_id: str) -> Optional[dict]:
+        """查询任务结果，过期则删除"""
+        entry = self.tasks.get(task_id)
+        if entry is None:
+            return None
+        saved_at, task = entry
+        if time.monotonic() - saved_at > TASK_TTL:
+            del self.tasks[task_id]
+            return None
+        return task
+
+    def _save_task(self, task: dict) -> dict:
+        """保存任务结果，顺带清理过期及超出容量的旧任务"""
+        now = time.monotonic()
+        self.tasks[task["id"]] = (now, task)
+        self.tasks.move_to_end(task["id"])
+        while self.tasks:
+            saved_at, _ = next(iter(self.tasks.values()))
+            if now - saved_at <= TASK_TTL and len(self.tasks) <= TASK_MAX:
+                break
+            self.tasks.popitem(last=False)
+        return task
 
     async def process_task(self, task_id: str, skill_id: str, params: dict) -> dict:
         """处理任务"""
@@ -134,25 +249,30 @@ class FoodDeliveryAgent:
 
         try:
             result = await handler(params)
-            self.tasks[task_id] = {
+            return self._save_task({
                 "id": task_id,
                 "status": "completed",
                 "result": {"type": "text", "text": result},
-                "completed_at": datetime.now().isoformat()
-            }
-            return self.tasks[task_id]
+                "completed_at": _now_iso()
+            })
 
         except Exception as e:
-            self.tasks[task_id] = {
+            return self._save_task({
                 "id": task_id,
                 "status": "failed",
                 "error": str(e)
-            }
-            return self.tasks[task_id]
+            })
 
 
 # ==================== FastAPI ====================
 
+class ORJSONResponse(JSONResponse):
+    """使用orjson序列化的JSON响应"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
 agent = FoodDeliveryAgent()
 
 
@@ -164,10 +284,12 @@ async def lifespan(app: FastAPI):
     print("功能: 统一搜索（支持地点名、预算、外卖筛选）")
     print("=" * 50)
     yield
+    await food_api_service.aclose()
+    await qwen_service.aclient.close()
     print("美食助手Agent 关闭")
 
 
-app = FastAPI(title="美食助手Agent", lifespan=lifespan)
+app = FastAPI(title="美食助手Agent", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
 @app.get("/.well-known/agent-card.json")
@@ -178,15 +300,19 @@ async def get_agent_card():
 @app.post("/a2a")
 async def handle_a2a(request: Request):
     """处理A2A JSON-RPC请求"""
-    body = await request.json()
+    try:
+        body = A2ARequest.parse(await request.body())
+    except orjson.JSONDecodeError:
+        return _jsonrpc_error(-32700, "Parse error")
+    except ValueError as e:
+        return _jsonrpc_error(-32600, f"Invalid request: {e}")
 
-    method = body.get("method")
-    req_params = body.get("params", {})
-    request_id = body.get("id")
+    method = body.method
+    req_params = body.params
 
     response = {
         "jsonrpc": "2.0",
-        "id": request_id
+        "id": body.id
     }
 
     try:
@@ -205,9 +331,9 @@ async def handle_a2a(request: Request):
                 response["result"] = result
 
         elif method == "tasks/get":
-            task_id = req_params.get("id")
-            if task_id in agent.tasks:
-                response["result"] = agent.tasks[task_id]
+            task = agent.get_task(req_params.get("id"))
+            if task is not None:
+                response["result"] = task
             else:
                 response["error"] = {"code": -32001, "message": "Task not found"}
 
@@ -220,7 +346,74 @@ async def handle_a2a(request: Request):
     except Exception as e:
         response["error"] = {"code": -32000, "message": str(e)}
 
-    return JSONResponse(content=response)
+    return ORJSONResponse(content=response)
+
+
+def _jsonrpc_error(code: int, message: str, request_id=None) -> ORJSONResponse:
+    """JSON-RPC错误响应（用于请求无法解析或无法进入正常处理流程时）"""
+    return ORJSONResponse(content={
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message}
+    })
+
+
+@app.post("/a2a/stream")
+async def handle_a2a_stream(request: Request):
+    """以SSE流式处理A2A tasks/send请求，每个事件携带一段增量文本"""
+    try:
+        body = A2ARequest.parse(await request.body())
+    except orjson.JSONDecodeError:
+        return _jsonrpc_error(-32700, "Parse error")
+    except ValueError as e:
+        return _jsonrpc_error(-32600, f"Invalid request: {e}")
+
+    if body.method != "tasks/send":
+        return _jsonrpc_error(-32601, f"Unknown method: {body.method}，流式接口仅支持tasks/send", body.id)
+
+    req_params = body.params
+    task_id = req_params.get("id", str(uuid.uuid4()))
+    skill_id = req_params.get("skill_id")
+    skill_params = req_params.get("params", {})
+
+    if not skill_id:
+        return _jsonrpc_error(-32602, "缺少skill_id参数", body.id)
+    handler = agent.stream_handlers.get(skill_id)
+    if not handler:
+        return _jsonrpc_error(-32602, f"未知技能: {skill_id}，支持的技能: search", body.id)
+
+    async def event_stream():
+        # 收集已产出的文本，结束时与process_task一样保存任务，供tasks/get查询
+        parts = []
+        try:
+            async for text in handler(skill_params):
+                parts.append(text)
+                yield _sse_event({
+                    "id": task_id,
+                    "status": "working",
+                    "result": {"type": "text", "text": text}
+                })
+            task = agent._save_task({
+                "id": task_id,
+                "status": "completed",
+                "result": {"type": "text", "text": "".join(parts)},
+                "completed_at": _now_iso()
+            })
+        except Exception as e:
+            task = agent._save_task({
+                "id": task_id,
+                "status": "failed",
+                "error": str(e)
+            })
+        # 最后一个事件携带完整任务结果
+        yield _sse_event(task)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+def _sse_event(data: dict) -> bytes:
+    """编码一条SSE事件"""
+    return b"data: " + orjson.dumps(data) + b"\n\n"
 
 
 @app.get("/health")
@@ -7,127 +7,74 @@ async def test():
     url = "http://localhost:8080/a2a"
     results = []
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-
+    # 5个测试请求互不依赖，并发发送
+    cases = [
         # Test 1: recommend - 综合条件推荐（口味+预算+菜系）
-        print("[1/5] Testing recommend - 综合条件...")
-        payload1 = {
-            "jsonrpc": "2.0",
-            "id": "test-001",
-            "method": "tasks/send",
-            "params": {
-                "id": "task-001",
-                "skill_id": "recommend",
-                "params": {
-                    "taste": "辣",
-                    "budget_max": 80,
-                    "cuisine": "川菜",
-                    "address": "成都市锦江区春熙路",
-                    "city": "成都"
-                }
-            }
-        }
-        resp1 = await client.post(url, json=payload1)
-        results.append({
-            "test": "recommend - 成都春熙路辣味川菜80元内",
-            "skill_id": "recommend",
-            "response": resp1.json()
-        })
-        print("[OK] done")
-
+        ("recommend - 成都春熙路辣味川菜80元内", "recommend", {
+            "taste": "辣",
+            "budget_max": 80,
+            "cuisine": "川菜",
+            "address": "成都市锦江区春熙路",
+            "city": "成都"
+        }),
         # Test 2: recommend - 仅口味
-        print("[2/5] Testing recommend - 仅口味...")
-        payload2 = {
-            "jsonrpc": "2.0",
-            "id": "test-002",
-            "method": "tasks/send",
-            "params": {
-                "id": "task-002",
-                "skill_id": "recommend",
-                "params": {
-                    "taste": "清淡",
-                    "address": "广州市天河区珠江新城",
-                    "city": "广州"
-                }
-            }
-        }
-        resp2 = await client.post(url, json=payload2)
-        results.append({
-            "test": "recommend - 广州珠江新城清淡口味",
-            "skill_id": "recommend",
-            "response": resp2.json()
-        })
-        print("[OK] done")
-
+        ("recommend - 广州珠江新城清淡口味", "recommend", {
+            "taste": "清淡",
+            "address": "广州市天河区珠江新城",
+            "city": "广州"
+        }),
         # Test 3: recommend - 仅菜系/分类
-        print("[3/5] Testing recommend - 仅菜系...")
-        payload3 = {
-            "jsonrpc": "2.0",
-            "id": "test-003",
-            "method": "tasks/send",
-            "params": {
-                "id": "task-003",
-                "skill_id": "recommend",
-                "params": {
-                    "cuisine": "日料",
-                    "address": "深圳市南山区科技园",
-                    "city": "深圳"
-                }
-            }
-        }
-        resp3 = await client.post(url, json=payload3)
-        results.append({
-            "test": "recommend - 深圳科技园日料",
-            "skill_id": "recommend",
-            "response": resp3.json()
-        })
-        print("[OK] done")
-
+        ("recommend - 深圳科技园日料", "recommend", {
+            "cuisine": "日料",
+            "address": "深圳市南山区科技园",
+            "city": "深圳"
+        }),
         # Test 4: search - 搜索餐厅
-        print("[4/5] Testing search...")
-        payload4 = {
-            "jsonrpc": "2.0",
-            "id": "test-004",
-            "method": "tasks/send",
-            "params": {
-                "id": "task-004",
-                "skill_id": "search",
-                "params": {
-                    "keyword": "海底捞",
-                    "city": "上海"
-                }
-            }
-        }
-        resp4 = await client.post(url, json=payload4)
-        results.append({
-            "test": "search - 上海海底捞",
-            "skill_id": "search",
-            "response": resp4.json()
-        })
-        print("[OK] done")
-
+        ("search - 上海海底捞", "search", {
+            "keyword": "海底捞",
+            "city": "上海"
+        }),
         # Test 5: detail - 餐厅详情
-        print("[5/5] Testing detail...")
-        payload5 = {
+        ("detail - 北京肯德基详情", "detail", {
+            "restaurant_name": "肯德基",
+            "city": "北京"
+        }),
+    ]
+
+    payloads = [
+        {
             "jsonrpc": "2.0",
-            "id": "test-005",
+            "id": f"test-{i:03d}",
             "method": "tasks/send",
             "params": {
-                "id": "task-005",
-                "skill_id": "detail",
-                "params": {
-                    "restaurant_name": "肯德基",
-                    "city": "北京"
-                }
+                "id": f"task-{i:03d}",
+                "skill_id": skill_id,
+                "params": params
             }
         }
-        resp5 = await client.post(url, json=payload5)
+        for i, (_, skill_id, params) in enumerate(cases, 1)
+    ]
+
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        print(f"Sending {len(payloads)} tests concurrently...")
+        # return_exceptions: 单个请求失败不影响其他请求
+        responses = await asyncio.gather(
+            *(client.post(url, json=payload) for payload in payloads),
+            return_exceptions=True
+        )
+
+    for (name, skill_id, _), resp in zip(cases, responses):
+        if isinstance(resp, Exception):
+            print(f"[FAIL] {name}: {resp}")
+            response = {"error": str(resp)}
+        else:
+            print(f"[OK] {name}")
+            response = resp.json()
         results.append({
-            "test": "detail - 北京肯德基详情",
-            "skill_id": "detail",
-            "response": resp5.json()
+            "test": name,
+            "skill_id": skill_id,
+            "response": response
         })
-        print("[OK] done")
 
     # Save results
     with open("test_results.json", "w", encoding="utf-8") as f: